@@ -1,5 +1,28 @@
+import importlib
+
 from .about import __version__  # noqa
-from .player import VLC, VLCWindow  # noqa
+
+# ``player`` loads libvlc and ``window`` loads Qt, so neither is imported
+# until one of these names is first looked up.
+_LAZY_ATTRIBUTES = {
+    "VLC": ".player",
+    "VLCWindow": ".window",
+    "Status": ".player",
+}
+
+
+def __getattr__(name):
+    try:
+        module_name = _LAZY_ATTRIBUTES[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted({*globals(), *_LAZY_ATTRIBUTES})
 
 
-all = ["VLC", "VLCWindow"]
+__all__ = ["VLC", "VLCWindow"]
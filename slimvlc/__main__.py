@@ -5,10 +5,7 @@ import stat
 import time
 from threading import Thread
 
-from PySide6.QtWidgets import QApplication
-from vlc import EventType
-
-from .player import VLC, VLCWindow, Status
+from .metrics import parse_address
 
 logger = logging.getLogger("slimvlc")
 
@@ -70,14 +67,41 @@ if __name__ == "__main__":
     parser.add_argument(
         "--fifo", help="MPlayer fifo mode emulation - set to a FIFO", default=None
     )
+    parser.add_argument(
+        "--sub-lang",
+        default="",
+        type=lambda value: tuple(filter(None, value.split(","))),
+        help="Comma separated subtitle languages in order of preference, "
+        "as tagged in the media (e.g. eng,en). Use 'off' to disable subtitles",
+    )
+    parser.add_argument(
+        "--metrics",
+        metavar="ADDRESS",
+        type=parse_address,
+        help="Serve Prometheus metrics on PORT, HOST:PORT or a unix socket path "
+        "(disabled by default)",
+        default=None,
+    )
 
     args = parser.parse_args()
+
+    # Deferred so that ``--help`` and argument errors never load libvlc or Qt.
+    from vlc import EventType
+
+    from .player import VLC, Status
+
     if args.verbose:
         args.verbose = sum(args.verbose)
         logger.setLevel(logging.DEBUG)
         VLC.set_instance(VLC.make_instance(verbose=args.verbose))
 
-    vlc = VLC(args.filepath, args.snaps_dir, args.osd_visible)
+    if args.metrics:
+        from .metrics import Metrics
+        from .metrics_server import serve
+
+        serve(VLC.set_metrics(Metrics()), args.metrics)
+
+    vlc = VLC(args.filepath, args.snaps_dir, args.osd_visible, args.sub_lang)
     while vlc.status == Status.PARSING:
         time.sleep(0.5)
     if vlc.status != Status.PARSED:
@@ -93,6 +117,10 @@ if __name__ == "__main__":
         t.daemon = True
         t.start()
 
+    from PySide6.QtWidgets import QApplication
+
+    from .window import VLCWindow
+
     app = QApplication(sys.argv)
     vlc_window = VLCWindow(vlc, app)
 
@@ -0,0 +1,242 @@
+"""
+Prometheus text-format metrics for the player internals.
+
+Nothing here imports vlc, Qt or the HTTP server (see ``metrics_server``), and
+nothing is collected until a ``Metrics`` is handed to ``VLC.set_metrics``.
+"""
+
+import bisect
+import logging
+from threading import Lock
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+PARSE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra=()):
+    pairs = (*zip(names, values), *extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = Lock()
+        self._values = {}
+        if not self.labelnames:
+            # Unlabelled metrics are always exported, even before first use.
+            self._values[()] = self._zero()
+
+    def _zero(self):
+        return 0
+
+    def _check(self, labels):
+        assert len(labels) == len(self.labelnames), (
+            f"{self.name} expects labels {self.labelnames}, got {labels}"
+        )
+
+    def _samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            yield "", labels, (), value
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {_escape(self.documentation)}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        for suffix, labels, extra, value in self._samples():
+            lines.append(
+                f"{self.name}{suffix}"
+                f"{_format_labels(self.labelnames, labels, extra)} "
+                f"{_format_value(value)}"
+            )
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        self._check(labels)
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, *labels):
+        self._check(labels)
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _zero(self):
+        return [0] * (len(self.buckets) + 1), 0.0
+
+    def observe(self, value, *labels):
+        self._check(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            try:
+                counts, total = self._values[labels]
+            except KeyError:
+                counts, total = self._zero()
+            counts[index] += 1
+            self._values[labels] = (counts, total + value)
+
+    def _samples(self):
+        with self._lock:
+            items = sorted(
+                (labels, (counts[:], total))
+                for labels, (counts, total) in self._values.items()
+            )
+        for labels, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                yield "_bucket", labels, (("le", _format_value(bound)),), cumulative
+            yield "_sum", labels, (), total
+            yield "_count", labels, (), cumulative
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric):
+        assert isinstance(metric, _Metric)
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, func):
+        """
+        ``func`` is called on every scrape and returns an iterable of metrics
+        to render, so values that are costly to read are only read on demand.
+        """
+        assert callable(func)
+        if func not in self._collectors:
+            self._collectors.append(func)
+        return func
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for func in self._collectors[:]:
+            try:
+                for metric in func():
+                    lines.extend(metric.render())
+            except Exception:
+                logger.exception(f"Unable to run collector {func!r}")
+        lines.append("")
+        return "\n".join(lines)
+
+
+def parse_address(address):
+    """
+    Accepts ``PORT``, ``HOST:PORT``, ``[IPV6]:PORT`` or a Unix socket path
+    (either absolute, relative with a ``/`` in it, or prefixed with ``unix:``).
+    """
+    if address.startswith("unix:"):
+        path = address[len("unix:") :]
+        if not path:
+            raise ValueError(f"{address!r} lacks a socket path")
+        return path
+    if "/" in address:
+        return address
+    host, _, port = address.rpartition(":")
+    if host.startswith("[") and host.endswith("]"):
+        host = host[1:-1]
+    elif ":" in host:
+        raise ValueError("IPv6 addresses must be bracketed, as in [::1]:9100")
+    if not port.isdigit() or not 0 <= int(port, 10) <= 65535:
+        raise ValueError(f"{address!r} is not a port, HOST:PORT or socket path")
+    return (host or "127.0.0.1", int(port, 10))
+
+
+class Metrics(Registry):
+    def __init__(self):
+        super().__init__()
+        self.events_dispatched = self.register(
+            Counter(
+                "slimvlc_events_dispatched_total",
+                "libvlc events dispatched to listeners",
+                ("type",),
+            )
+        )
+        self.listener_errors = self.register(
+            Counter(
+                "slimvlc_listener_errors_total",
+                "Exceptions raised by event listeners",
+                ("type",),
+            )
+        )
+        self.listener_removals = self.register(
+            Counter(
+                "slimvlc_listener_removals_total",
+                "Event listeners removed, by reason",
+                ("type", "reason"),
+            )
+        )
+        self.listener_duration = self.register(
+            Histogram(
+                "slimvlc_listener_duration_seconds",
+                "Time spent in a single event listener",
+                ("type",),
+            )
+        )
+        self.seeks = self.register(Counter("slimvlc_seeks_total", "Seeks requested"))
+        self.seek_duration = self.register(
+            Histogram(
+                "slimvlc_seek_duration_seconds",
+                "Time from a seek request to the next position change",
+            )
+        )
+        self.fifo_commands = self.register(
+            Counter(
+                "slimvlc_fifo_commands_total",
+                "MPlayer FIFO commands processed",
+                ("command",),
+            )
+        )
+        self.snapshots = self.register(
+            Counter("slimvlc_snapshots_total", "Snapshots taken")
+        )
+        self.parse_duration = self.register(
+            Histogram(
+                "slimvlc_media_parse_duration_seconds",
+                "Time taken for libvlc to parse the media",
+                buckets=PARSE_BUCKETS,
+            )
+        )
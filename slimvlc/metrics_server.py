@@ -0,0 +1,71 @@
+"""
+HTTP endpoint for ``slimvlc.metrics``, only imported when ``--metrics`` is set.
+"""
+
+import logging
+import os
+import socket
+import socketserver
+import stat
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+
+from .metrics import parse_address
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.partition("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.server.registry.render().encode("utf8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self):
+        # Unix socket peers have no (host, port) pair.
+        if isinstance(self.client_address, tuple):
+            return super().address_string()
+        return str(self.client_address) or "unix"
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+
+class _IPv6HTTPServer(ThreadingHTTPServer):
+    address_family = socket.AF_INET6
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(registry, address):
+    """
+    Start serving ``registry`` on a daemon thread and return the server.
+    """
+    address = parse_address(address) if isinstance(address, str) else address
+    if isinstance(address, tuple):
+        server_class = ThreadingHTTPServer
+        if ":" in address[0]:
+            server_class = _IPv6HTTPServer
+        server = server_class(address, _MetricsHandler)
+        server.daemon_threads = True
+    else:
+        if os.path.exists(address) and stat.S_ISSOCK(os.stat(address).st_mode):
+            os.unlink(address)
+        server = _UnixHTTPServer(address, _MetricsHandler)
+    server.registry = registry
+
+    t = Thread(target=server.serve_forever, name="slimvlc-metrics")
+    t.daemon = True
+    t.start()
+    logger.info(f"Serving metrics on {address}")
+    return server
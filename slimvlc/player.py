@@ -1,31 +1,44 @@
 import urllib.parse
 import logging
+import pathlib
 import time
+import weakref
 from enum import Enum
 import functools
 from threading import Thread, Lock
 
-from PySide6 import QtCore
-from PySide6.QtWidgets import QApplication  # , QOpenGLWidget
-from PySide6.QtOpenGLWidgets import QOpenGLWidget
-from PySide6.QtGui import QCursor
-
 from vlc import (
     Instance,
     EventType,
     VideoMarqueeOption,
     Position,
     Media,
-    libvlc_video_get_spu,
-    # MediaSlaveType,
+    MediaStats,
+    MediaSlaveType,
 )
 import ctypes
 import vlc
 
+from .subtitles import (
+    NO_SUBTITLES,
+    find_sidecar_subtitles,
+    index_subtitles,
+    merge_spu_descriptions,
+    preferred_subtitle_index,
+    subtitles_from_tracks,
+)
+
 try:
     from vlc import libvlc_errmsg
 except ImportError:
 
+    @functools.lru_cache(maxsize=None)
+    def _libvlc_errmsg_function():
+        # Resolved on the first error rather than at import time.
+        return vlc._Cfunctions.get("libvlc_errmsg", None) or vlc._Cfunction(
+            "libvlc_errmsg", (), None, ctypes.c_char_p
+        )
+
     def libvlc_errmsg():
         """Sets the LibVLC error status and message for the current thread.
         Any previous error is overridden.
@@ -33,13 +46,9 @@ except ImportError:
         @param ap: the arguments.
         @return: a nul terminated string in any case.
         """
-        f = vlc._Cfunctions.get("libvlc_errmsg", None) or vlc._Cfunction(
-            "libvlc_errmsg", (), None, ctypes.c_char_p
-        )
-        return f()
+        return _libvlc_errmsg_function()()
 
     vlc._Globals["libvlc_errmsg"] = libvlc_errmsg
-    libvlc_errmsg()
 
 logger = logging.getLogger(__name__)
 
@@ -64,184 +73,47 @@ def humanize_time(seconds):
     return "%d:%02d:%02d" % (h, m, s)
 
 
+def _event_name(event_type):
+    return str(event_type).rpartition(".")[2]
+
+
 class Status(Enum):
     REQUIRES_MEDIA = 1
     PARSING = 2
     PARSED = 3
 
 
-class VLCWindow(QOpenGLWidget):
-    def try_fullscreen(self):
-        self.showFullScreen()
-        self.raise_()
-
-    def try_normal(self):
-        self.showNormal()
-        self.raise_()
-
-    def __init__(self, vlc, app: QApplication | None = None):
-        assert isinstance(vlc, VLC)
-        self._vlc = vlc
-        if app is None:
-            app = QApplication.instance()
-        self._app = app
-        self._events = ()
-
-        super().__init__()
-        self.setAttribute(QtCore.Qt.WidgetAttribute.WA_OpaquePaintEvent)
-
-        QApplication.setOverrideCursor(QCursor(QtCore.Qt.BlankCursor))
-
-        p = self.palette()
-        p.setColor(self.backgroundRole(), QtCore.Qt.gray)
-        self.setPalette(p)
-
-        self._subtitle_index = 0
-        self._vlc._player.set_nsobject(self.winId())
-        self._setup_events()
-        self.play()
-        self.try_fullscreen()
-
-    def add_event_listener(
-        self,
-        event: EventType,
-        func,
-        *args,
-        **kwargs,
-    ):
-        thunk = func
-        if args or kwargs:
-            thunk = functools.partial(func, *args, **kwargs)
-        self._events = (*self._events, (event, func, thunk))
-        self._vlc.add_event_listener(event, thunk)
-        return (event, thunk)
-
-    def remove_event_listener(self, event: EventType, func):
-        for index, (e, _, thunk) in self._events:
-            if (e, thunk) == (event, func):
-                self._events = (*self._events[:index], *self._events[index + 1 :])
-                return func
-        raise LookupError(event, func)
-
-    def _setup_events(self):
-        self.add_event_listener(
-            EventType.MediaPlayerEndReached,
-            self._on_player_done,
-            EventType.MediaPlayerEndReached,
-        )
-        self.add_event_listener(
-            EventType.MediaPlayerStopped,
-            self._on_player_done,
-            EventType.MediaPlayerStopped,
-        )
-        self.add_event_listener(
-            EventType.MediaPlayerPositionChanged, self._vlc._on_position_change
-        )
-        self.add_event_listener(
-            EventType.MediaPlayerVout,
-            self._on_play_start,
-        )
-        logger.debug(f"Setup {len(self._events)} event handlers")
-
-    def _remove_events(self):
-        logger.debug(f"_remove_events: {len(self._events)}")
-        for index in range(len(self._events) - 1, -1, -1):
-            wtf = self._events[index]
-            try:
-                event_type, _, thunk = wtf
-            except ValueError:
-                raise TypeError(f"Unhandled type for {wtf!r} (a {type(wtf)!r})")
-            else:
-                try:
-                    self._vlc.remove_event_listener(event_type, thunk)
-                except Exception:
-                    logger.exception(f"Unable to remove event_listener for {thunk!r}")
-                else:
-                    self._events = (*self._events[:index], *self._events[index + 1 :])
-                    logger.debug(f"removed event listener {event_type} {thunk}")
-
-    def _on_player_done(self, event):
-        ms: int = self._vlc.timestamp_ms
-        logger.info(
-            f"_on_player_done: {event!r}, "
-            f"at time {humanize_time(ms / 1000.0)} ({ms:,d} ms)"
-        )
-        self.quit()
-
-    def quit(self):
-        logger.debug(f"{self!r}->quit!")
-        self._app.quit()
-
-    def closeEvent(self, event):
-        logger.debug(f"close event! {event!r}")
-        if self.player_status == "is_playing":
-            self.pause()
-        self.showNormal()
-        self._remove_events()
-        logger.debug("accepting close")
-        event.accept()
-
-    def _on_play_start(self):
-        first_time = self._vlc._subtitle_index is None
-        self._vlc._subtitle_index = 0
-        if first_time:
-            self._vlc._player.video_set_spu(-1)
-            self._vlc.cycle_subtitles(first_time)
-        logger.debug(f"_on_play_start: {first_time=!r}")
-
-    def play(self):
-        self._vlc.play()
-
-    @property
-    def player_status(self):
-        if self._vlc._player.is_playing():
-            return "playing"
-        return "not_playing"
+def __getattr__(name):
+    # Kept importable from here for callers that predate ``slimvlc.window``.
+    if name == "VLCWindow":
+        from .window import VLCWindow
 
-    def pause(self):
-        if self._vlc._player.is_playing():
-            QApplication.restoreOverrideCursor()
-        else:
-            QApplication.setOverrideCursor(QCursor(QtCore.Qt.BlankCursor))
-        self._vlc.pause()
-
-    def keyPressEvent(self, event):
-        key = event.key()
-        if key in (QtCore.Qt.Key_Escape, ord("Q")):
-            self.close()
-        elif key in (QtCore.Qt.Key_Left, QtCore.Qt.LeftArrow):
-            self._vlc.timestamp_ms -= 10 * 1000
-        elif key in (QtCore.Qt.Key_Right, QtCore.Qt.RightArrow):
-            self._vlc.timestamp_ms += 10 * 1000
-        elif key in (QtCore.Qt.Key_Up, QtCore.Qt.UpArrow):
-            self._vlc.timestamp_ms += 60 * 1000
-        elif key in (QtCore.Qt.Key_Down, QtCore.Qt.DownArrow):
-            self._vlc.timestamp_ms -= 60 * 1000
-        elif key == QtCore.Qt.Key_Space:
-            self.pause()
-        elif key == ord("F"):
-            self.try_fullscreen()
-        elif key == ord("O"):
-            self._vlc.osd_visibility = not self._vlc.osd_visibility
-        elif key == ord("C"):
-            self._vlc.cycle_subtitles()
-        elif key == ord("T"):
-            self._vlc.take_snapshot()
-        else:
-            try:
-                logger.debug(f"Unknown key {key}, {chr(key)}")
-            except UnicodeError:
-                logger.debug(f"Unknown key {key} ???")
+        return VLCWindow
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class VLC:
     INSTANCE = None
+    METRICS = None
+    PLAYERS = weakref.WeakSet()
 
-    def __init__(self, media_path, snapshot_directory=None, osd_visible=False):
+    def __init__(
+        self,
+        media_path,
+        snapshot_directory=None,
+        osd_visible=False,
+        subtitle_languages=(),
+    ):
         self._lock = Lock()
         self._subtitles = ()
         self._subtitle_index = None
+        self._sidecars = ()
+        self.subtitle_languages = tuple(
+            language.lower() for language in subtitle_languages
+        )
         self._listeners = {}
+        self._seek_requested_at = None
+        self._parse_started_at = None
         self.snapshot_directory = snapshot_directory
 
         if self.INSTANCE is None:
@@ -253,38 +125,28 @@ class VLC:
         if osd_visible:
             visible = True
         self.setup_osd(visible)
+        self.PLAYERS.add(self)
 
         self.media_info(media_path)
 
-    def cycle_subtitles(self, correct_sub_ids=False):
+    def cycle_subtitles(self):
         assert self.status == Status.PARSED, "You can't cycle subs for this status!"
-        sub_ids = self._player.video_get_spu_description()
-        logger.debug(f"SPUs offered: {sub_ids}")
         logger.debug(f"Tracks {self._subtitles}")
 
         if len(self._subtitles) < 2:
             logger.debug("No subtitles to cycle with!")
             return
 
-        if correct_sub_ids:
-            for track, (
-                track_id,
-                name,
-            ) in zip(self._subtitles, sub_ids):
-                if track["id"] != track_id:
-                    logger.warn(
-                        "Track id (named {}) was submitted as {} but really should be {}".format(
-                            name, track["id"], track_id
-                        )
-                    )
-                track["id"] = track_id
-                track["pretty_name"] = name
+        self.select_subtitle((self._subtitle_index + 1) % len(self._subtitles))
 
-        current_subtitle_track = libvlc_video_get_spu(self._player)
-        logger.debug(f"Current subtitle id before set: {current_subtitle_track}")
-        self._subtitle_index = (self._subtitle_index + 1) % len(self._subtitles)
+    def preferred_subtitle_index(self):
+        return preferred_subtitle_index(
+            self._subtitles, self._subtitles_by_language, self.subtitle_languages
+        )
 
-        track = self._subtitles[self._subtitle_index]
+    def select_subtitle(self, index):
+        self._subtitle_index = index
+        track = self._subtitles[index]
         track_id = track["id"]
         result = self._player.video_set_spu(track_id)
         log = logger.debug
@@ -298,25 +160,29 @@ class VLC:
         if result == -1:
             log(f"Unable to set the subtitle track: {libvlc_errmsg()}")
 
-        current_subtitle_track = libvlc_video_get_spu(self._player)
-        logger.debug(f"Current subtitle id after set: {current_subtitle_track}")
-
     def _handle_mplayer_command(self, command):
         command = urllib.parse.unquote(command)
+        name = "unknown"
         if command.startswith("seek "):
+            name = "seek"
             logger.debug(f"Seek ? {command}")
             seconds = int(command.split(" ", 2)[1], 10)
             self.timestamp_ms += seconds * 1000
         elif command.startswith("screenshot"):
+            name = "screenshot"
             logger.debug(f"Screenshot ? {command}")
             self.take_snapshot()
         elif command.startswith("pause"):
+            name = "pause"
             self.pause()
         elif command.startswith("quit"):
+            name = "quit"
             self._player.stop()
         elif command.startswith("mute"):
+            name = "mute"
             self._player.audio_toggle_mute()
         elif command.startswith("osd "):
+            name = "osd"
             logger.debug(f"OSD ? {command}")
             try:
                 _, maybe_level, *_ = command.split(" ")
@@ -326,6 +192,8 @@ class VLC:
                 level = int(maybe_level, 10)
                 logger.debug(f"ignoring osd value {level!r}")
                 self.osd_visibility = not self.osd_visibility
+        if self.METRICS is not None:
+            self.METRICS.fifo_commands.inc(name)
 
     def drain_named_fifo(self, path):
         logger.debug(f"Reading named fifo from {path}")
@@ -350,7 +218,9 @@ class VLC:
         assert self.status == Status.PARSED and self._player.is_playing()
         if self.snapshot_directory is None:
             return
-        self._player.video_take_snapshot(0, self.snapshot_directory, 0, 0)
+        result = self._player.video_take_snapshot(0, self.snapshot_directory, 0, 0)
+        if self.METRICS is not None and result != -1:
+            self.METRICS.snapshots.inc()
 
     def pause(self):
         self._player.pause()
@@ -385,6 +255,9 @@ class VLC:
     def timestamp_ms(self, val):
         result = float(val) / self.duration_ms
         logger.debug(f"Seek -> {val} -> {self.duration_ms} -> set_position({result})")
+        if self.METRICS is not None:
+            self.METRICS.seeks.inc()
+            self._seek_requested_at = time.perf_counter()
         self._player.set_position(result)
 
     def _on_position_change(self):
@@ -420,17 +293,38 @@ class VLC:
         self.event_manager.event_attach(event_type, self._handle_event)
 
     def _handle_event(self, event):
+        metrics = self.METRICS
+        if metrics is not None:
+            event_name = _event_name(event.type)
+            metrics.events_dispatched.inc(event_name)
+            if (
+                self._seek_requested_at is not None
+                and event.type == EventType.MediaPlayerPositionChanged
+            ):
+                metrics.seek_duration.observe(
+                    time.perf_counter() - self._seek_requested_at
+                )
+                self._seek_requested_at = None
         try:
             funcs = self._listeners[event.type]
         except KeyError:
             logger.exception(f"{event.type} is not registered")
         else:
             for func in funcs[:]:
+                if metrics is not None:
+                    started_at = time.perf_counter()
                 try:
                     func()
                 except Exception:
                     logger.exception("Unable to execute! Removing!")
                     funcs.remove(func)
+                    if metrics is not None:
+                        metrics.listener_errors.inc(event_name)
+                        metrics.listener_removals.inc(event_name, "error")
+                if metrics is not None:
+                    metrics.listener_duration.observe(
+                        time.perf_counter() - started_at, event_name
+                    )
 
     def remove_event_listener(self, event_type, func):
         try:
@@ -442,10 +336,26 @@ class VLC:
                 f"Unable to remove {event_type} -> {func} as it never existed!"
             )
         else:
+            if self.METRICS is not None:
+                self.METRICS.listener_removals.inc(_event_name(event_type), "requested")
             if not self._listeners[event_type]:
                 del self._listeners[event_type]
 
-    def _timeout_thread(self, media, timeout):
+    def _parse_thread(self, media, path, timeout):
+        sidecars = []
+        for sidecar, language in find_sidecar_subtitles(path):
+            uri = pathlib.Path(sidecar).as_uri()
+            if media.slaves_add(MediaSlaveType.subtitle, 4, uri) == -1:
+                logger.warning(f"Unable to attach {sidecar}: {libvlc_errmsg()}")
+            else:
+                logger.debug(f"Attached subtitle {sidecar}")
+                sidecars.append((sidecar, language))
+        self._sidecars = tuple(sidecars)
+        if sidecars:
+            # Keep libvlc from adding its own fuzzy matches, so the new SPU
+            # tracks at playback are exactly the sidecars attached here.
+            media.add_option(":no-sub-autodetect-file")
+        media.parse_with_options(0x0 | 0x1, (timeout - 1) * 1000)
         time.sleep(timeout)
         self._media_parsed(media, True)
 
@@ -453,22 +363,18 @@ class VLC:
         return self._media_parsed(self._media_info)
 
     def media_info(self, path):
-        self._subtitles = [
-            {
-                "id": -1,
-                "name": "nolang",
-                "track": None,
-            }
-        ]
+        self._set_subtitles((NO_SUBTITLES,))
+        self._sidecars = ()
         self.status = Status.PARSING
+        self._parse_started_at = time.perf_counter()
         media = Media(path)
         self._media_info = media
         mgr = media.event_manager()
         mgr.event_attach(EventType.MediaParsedChanged, self._on_media_parsed)
-        # media.slaves_add(MediaSlaveType.subtitle, 1, 'file://' + EMPTY_SUBTITLE_SRT)
-        media.parse_with_options(0x0 | 0x1, 10 * 1000)
 
-        t = Thread(target=self._timeout_thread, args=(media, 11))
+        # Sidecar subtitles have to be attached before parsing, so both happen
+        # off the caller's thread.
+        t = Thread(target=self._parse_thread, args=(media, path, 11))
         t.daemon = True
         t.start()
 
@@ -499,13 +405,61 @@ class VLC:
 
             logger.info(f"Setting VLC MRL to {media.get_mrl()}")
             self._player.set_media(self._media_info)
+            self._set_subtitles(subtitles_from_tracks(tracks))
             self.status = Status.PARSED
+            if self.METRICS is not None:
+                self.METRICS.parse_duration.observe(
+                    time.perf_counter() - self._parse_started_at
+                )
 
-            for track in tracks:
-                if track.type.value == 2:
-                    self._subtitles.append(
-                        {"track": track, "id": track.id, "name": track.language}
-                    )
+    def _set_subtitles(self, subtitles):
+        self._subtitles = tuple(subtitles)
+        self._subtitles_by_id, self._subtitles_by_language = index_subtitles(
+            self._subtitles
+        )
+        logger.debug(f"Subtitle tracks {self._subtitles}")
+
+    def reconcile_subtitles(self):
+        """
+        libvlc only loads sidecar slaves once playback starts, so their tracks
+        are missing from the parse-time table. When sidecars were attached,
+        fetch the SPU descriptions once and merge them in.
+        """
+        assert self.status == Status.PARSED, "You can't reconcile for this status!"
+        if not self._sidecars:
+            return
+        descriptions = self._player.video_get_spu_description()
+        logger.debug(f"SPUs offered: {descriptions}")
+        with self._lock:
+            self._set_subtitles(
+                merge_spu_descriptions(
+                    self._subtitles,
+                    self._subtitles_by_id,
+                    descriptions,
+                    self._sidecars,
+                )
+            )
+
+    @classmethod
+    def _collect_media_stats(cls):
+        from .metrics import Gauge
+
+        gauge = Gauge(
+            "slimvlc_media_stat",
+            "libvlc statistics for the current media",
+            ("media", "stat"),
+        )
+        for player in tuple(cls.PLAYERS):
+            media = player._media_info
+            if media is None or player.status != Status.PARSED:
+                continue
+            stats = MediaStats()
+            if not media.get_stats(stats):
+                continue
+            mrl = media.get_mrl()
+            for name, _ in MediaStats._fields_:
+                gauge.set(getattr(stats, name), mrl, name)
+        return (gauge,)
 
     @classmethod
     def make_instance(cls, verbose=False):
@@ -530,3 +484,14 @@ class VLC:
         assert isinstance(instance, Instance)
         cls.INSTANCE = instance
         return instance
+
+    @classmethod
+    def set_metrics(cls, metrics):
+        from .metrics import Metrics
+
+        assert metrics is None or isinstance(metrics, Metrics)
+        if metrics is not None:
+            # One collector per registry covers every player.
+            metrics.add_collector(cls._collect_media_stats)
+        cls.METRICS = metrics
+        return metrics
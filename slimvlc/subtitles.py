@@ -0,0 +1,164 @@
+"""
+The subtitle track table, kept free of vlc so it can be built and tested on
+its own. Tracks are dicts of ``id``, ``name``, ``language`` and ``track``.
+"""
+
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+SIDECAR_SUBTITLE_EXTENSIONS = frozenset((".srt", ".ass", ".vtt"))
+# libvlc's SPU type, ``vlc.TrackType.text``
+TEXT_TRACK_TYPE = 2
+NO_SUBTITLES = {
+    "id": -1,
+    "name": "nolang",
+    "language": None,
+    "track": None,
+}
+
+
+def decode(value):
+    if isinstance(value, bytes):
+        return value.decode("utf8", "replace")
+    return value
+
+
+def find_sidecar_subtitles(media_path):
+    """
+    Subtitle files next to ``media_path`` that share its name, e.g.
+    ``movie.srt`` or ``movie.en.ass`` for ``movie.mkv``, as ``(path, language)``
+    pairs. The language is the first suffix after the name (``en``), if any.
+    """
+    if not os.path.isfile(media_path):
+        return ()
+    directory, filename = os.path.split(os.path.abspath(media_path))
+    stem = os.path.splitext(filename)[0]
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        logger.exception(f"Unable to list {directory} for subtitles")
+        return ()
+    sidecars = []
+    for name in sorted(names):
+        base, ext = os.path.splitext(name)
+        if ext.lower() not in SIDECAR_SUBTITLE_EXTENSIONS:
+            continue
+        if base == stem or base.startswith(stem + "."):
+            language = base[len(stem) + 1 :].split(".", 1)[0].lower()
+            sidecars.append((os.path.join(directory, name), language))
+    return tuple(sidecars)
+
+
+def subtitles_from_tracks(tracks):
+    """
+    The subtitle table for the parsed ``tracks_get()`` of a media, starting
+    with the "no subtitles" entry.
+    """
+    subtitles = [NO_SUBTITLES]
+    for track in tracks:
+        if track.type.value != TEXT_TRACK_TYPE:
+            continue
+        language = (decode(track.language) or "").lower()
+        subtitles.append(
+            {
+                "id": track.id,
+                "name": language or decode(track.description),
+                "language": language or "und",
+                "track": track,
+            }
+        )
+    return tuple(subtitles)
+
+
+def index_subtitles(subtitles):
+    """
+    Returns ``(by_id, by_language)``, mapping track ids to their index and
+    languages to the indices of their tracks, in table order.
+    """
+    by_id = {}
+    by_language = {}
+    for index, track in enumerate(subtitles):
+        by_id[track["id"]] = index
+        if track["language"] is not None:
+            by_language.setdefault(track["language"], []).append(index)
+    return by_id, by_language
+
+
+def preferred_subtitle_index(subtitles, by_language, languages):
+    """
+    Index of the first of ``languages`` that has a track (``off`` or ``none``
+    picks no subtitles). Without a match, the first subtitle track is used.
+    """
+    for language in languages:
+        if language in ("off", "none"):
+            return 0
+        try:
+            return by_language[language][0]
+        except KeyError:
+            continue
+    if languages:
+        logger.info(
+            f"No subtitles for {', '.join(languages)}, "
+            f"offered: {', '.join(by_language) or 'none'}"
+        )
+    return min(1, len(subtitles) - 1)
+
+
+def merge_spu_descriptions(subtitles, by_id, descriptions, sidecars):
+    """
+    Reconcile the parse-time table with libvlc's ``(id, name)`` SPU
+    descriptions during playback. Tracks are matched by id only: parse-time
+    tracks libvlc does not offer are dropped, and offered ids the table lacks
+    are the attached ``sidecars``, matched by file name in the description,
+    then in order if exactly as many remain.
+    """
+    offered = []
+    extra = []
+    for track_id, name in descriptions:
+        if track_id in by_id:
+            offered.append(track_id)
+        else:
+            extra.append((track_id, decode(name) or ""))
+
+    merged = [NO_SUBTITLES]
+    for track in subtitles:
+        if track is NO_SUBTITLES:
+            continue
+        if track["id"] in offered:
+            merged.append(track)
+        else:
+            logger.warning(
+                f"Subtitle track {track['id']} ({track['name']}) is not offered "
+                "by libvlc, dropping it"
+            )
+
+    unmatched = list(sidecars)
+    matched = {}
+    for track_id, name in extra:
+        for sidecar in unmatched:
+            if os.path.basename(sidecar[0]) in name:
+                matched[track_id] = sidecar
+                unmatched.remove(sidecar)
+                break
+    remaining = [track_id for track_id, _ in extra if track_id not in matched]
+    if len(remaining) == len(unmatched):
+        matched.update(zip(remaining, unmatched))
+    elif unmatched:
+        logger.warning(
+            f"Unable to match {len(unmatched)} sidecars to "
+            f"{len(remaining)} new subtitle tracks"
+        )
+
+    for track_id, name in extra:
+        path, language = matched.get(track_id, (None, ""))
+        merged.append(
+            {
+                "id": track_id,
+                "name": os.path.basename(path) if path else name,
+                "language": language or "und",
+                "track": None,
+            }
+        )
+    return tuple(merged)
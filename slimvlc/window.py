@@ -0,0 +1,176 @@
+import functools
+import logging
+
+from PySide6 import QtCore
+from PySide6.QtWidgets import QApplication  # , QOpenGLWidget
+from PySide6.QtOpenGLWidgets import QOpenGLWidget
+from PySide6.QtGui import QCursor
+
+from vlc import EventType
+
+from .player import VLC, humanize_time
+
+logger = logging.getLogger(__name__)
+
+
+class VLCWindow(QOpenGLWidget):
+    def try_fullscreen(self):
+        self.showFullScreen()
+        self.raise_()
+
+    def try_normal(self):
+        self.showNormal()
+        self.raise_()
+
+    def __init__(self, vlc, app: QApplication | None = None):
+        assert isinstance(vlc, VLC)
+        self._vlc = vlc
+        if app is None:
+            app = QApplication.instance()
+        self._app = app
+        self._events = ()
+
+        super().__init__()
+        self.setAttribute(QtCore.Qt.WidgetAttribute.WA_OpaquePaintEvent)
+
+        QApplication.setOverrideCursor(QCursor(QtCore.Qt.BlankCursor))
+
+        p = self.palette()
+        p.setColor(self.backgroundRole(), QtCore.Qt.gray)
+        self.setPalette(p)
+
+        self._subtitle_index = 0
+        self._vlc._player.set_nsobject(self.winId())
+        self._setup_events()
+        self.play()
+        self.try_fullscreen()
+
+    def add_event_listener(
+        self,
+        event: EventType,
+        func,
+        *args,
+        **kwargs,
+    ):
+        thunk = func
+        if args or kwargs:
+            thunk = functools.partial(func, *args, **kwargs)
+        self._events = (*self._events, (event, func, thunk))
+        self._vlc.add_event_listener(event, thunk)
+        return (event, thunk)
+
+    def remove_event_listener(self, event: EventType, func):
+        for index, (e, _, thunk) in self._events:
+            if (e, thunk) == (event, func):
+                self._events = (*self._events[:index], *self._events[index + 1 :])
+                return func
+        raise LookupError(event, func)
+
+    def _setup_events(self):
+        self.add_event_listener(
+            EventType.MediaPlayerEndReached,
+            self._on_player_done,
+            EventType.MediaPlayerEndReached,
+        )
+        self.add_event_listener(
+            EventType.MediaPlayerStopped,
+            self._on_player_done,
+            EventType.MediaPlayerStopped,
+        )
+        self.add_event_listener(
+            EventType.MediaPlayerPositionChanged, self._vlc._on_position_change
+        )
+        self.add_event_listener(
+            EventType.MediaPlayerVout,
+            self._on_play_start,
+        )
+        logger.debug(f"Setup {len(self._events)} event handlers")
+
+    def _remove_events(self):
+        logger.debug(f"_remove_events: {len(self._events)}")
+        for index in range(len(self._events) - 1, -1, -1):
+            wtf = self._events[index]
+            try:
+                event_type, _, thunk = wtf
+            except ValueError:
+                raise TypeError(f"Unhandled type for {wtf!r} (a {type(wtf)!r})")
+            else:
+                try:
+                    self._vlc.remove_event_listener(event_type, thunk)
+                except Exception:
+                    logger.exception(f"Unable to remove event_listener for {thunk!r}")
+                else:
+                    self._events = (*self._events[:index], *self._events[index + 1 :])
+                    logger.debug(f"removed event listener {event_type} {thunk}")
+
+    def _on_player_done(self, event):
+        ms: int = self._vlc.timestamp_ms
+        logger.info(
+            f"_on_player_done: {event!r}, "
+            f"at time {humanize_time(ms / 1000.0)} ({ms:,d} ms)"
+        )
+        self.quit()
+
+    def quit(self):
+        logger.debug(f"{self!r}->quit!")
+        self._app.quit()
+
+    def closeEvent(self, event):
+        logger.debug(f"close event! {event!r}")
+        if self.player_status == "is_playing":
+            self.pause()
+        self.showNormal()
+        self._remove_events()
+        logger.debug("accepting close")
+        event.accept()
+
+    def _on_play_start(self):
+        first_time = self._vlc._subtitle_index is None
+        if first_time:
+            self._vlc.reconcile_subtitles()
+            self._vlc.select_subtitle(self._vlc.preferred_subtitle_index())
+        logger.debug(f"_on_play_start: {first_time=!r}")
+
+    def play(self):
+        self._vlc.play()
+
+    @property
+    def player_status(self):
+        if self._vlc._player.is_playing():
+            return "playing"
+        return "not_playing"
+
+    def pause(self):
+        if self._vlc._player.is_playing():
+            QApplication.restoreOverrideCursor()
+        else:
+            QApplication.setOverrideCursor(QCursor(QtCore.Qt.BlankCursor))
+        self._vlc.pause()
+
+    def keyPressEvent(self, event):
+        key = event.key()
+        if key in (QtCore.Qt.Key_Escape, ord("Q")):
+            self.close()
+        elif key in (QtCore.Qt.Key_Left, QtCore.Qt.LeftArrow):
+            self._vlc.timestamp_ms -= 10 * 1000
+        elif key in (QtCore.Qt.Key_Right, QtCore.Qt.RightArrow):
+            self._vlc.timestamp_ms += 10 * 1000
+        elif key in (QtCore.Qt.Key_Up, QtCore.Qt.UpArrow):
+            self._vlc.timestamp_ms += 60 * 1000
+        elif key in (QtCore.Qt.Key_Down, QtCore.Qt.DownArrow):
+            self._vlc.timestamp_ms -= 60 * 1000
+        elif key == QtCore.Qt.Key_Space:
+            self.pause()
+        elif key == ord("F"):
+            self.try_fullscreen()
+        elif key == ord("O"):
+            self._vlc.osd_visibility = not self._vlc.osd_visibility
+        elif key == ord("C"):
+            self._vlc.cycle_subtitles()
+        elif key == ord("T"):
+            self._vlc.take_snapshot()
+        else:
+            try:
+                logger.debug(f"Unknown key {key}, {chr(key)}")
+            except UnicodeError:
+                logger.debug(f"Unknown key {key} ???")
@@ -0,0 +1,84 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Neither ``import slimvlc`` nor ``python -m slimvlc --help`` should need any
+# of these; they load libvlc, Qt or the metrics HTTP server.
+FORBIDDEN_MODULES = frozenset(
+    (
+        "vlc",
+        "PySide6",
+        "slimvlc.player",
+        "slimvlc.window",
+        "http.server",
+        "socketserver",
+    )
+)
+# Microseconds, summed over the top level imports after interpreter startup.
+# About 2x the ~30ms measured for ``--help`` (mostly logging and argparse),
+# leaving room for slow CI machines; FORBIDDEN_MODULES is the precise guard.
+IMPORT_BUDGET_US = 60_000
+
+
+def _importtime(*args):
+    result = subprocess.run(
+        (sys.executable, "-X", "importtime", *args),
+        cwd=REPO_ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        check=True,
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|", 2)
+        if not self_us.strip().isdigit():
+            continue
+        # Nested imports are indented under the module that imported them.
+        modules.append((name[1:].rstrip(), int(cumulative_us)))
+    return modules
+
+
+def _top_level_total(modules, package):
+    start = next(
+        index
+        for index, (name, _) in enumerate(modules)
+        if name.strip().split(".", 1)[0] == package
+    )
+    return sum(
+        cumulative_us
+        for name, cumulative_us in modules[start:]
+        if not name.startswith(" ")
+    )
+
+
+@pytest.mark.parametrize(
+    "args",
+    (
+        ("-c", "import slimvlc"),
+        ("-c", "import slimvlc.metrics"),
+        ("-m", "slimvlc", "--help"),
+    ),
+)
+def test_import_time(args):
+    modules = _importtime(*args)
+    imported = {name.strip() for name, _ in modules}
+    assert "slimvlc" in imported
+    loaded = {
+        name
+        for name in imported
+        if name in FORBIDDEN_MODULES or name.split(".", 1)[0] in FORBIDDEN_MODULES
+    }
+    assert not loaded, f"{' '.join(args)} imported {', '.join(sorted(loaded))}"
+
+    total = _top_level_total(modules, "slimvlc")
+    assert total < IMPORT_BUDGET_US, (
+        f"{' '.join(args)} spent {total:,d}us importing, budget is "
+        f"{IMPORT_BUDGET_US:,d}us"
+    )
@@ -0,0 +1,153 @@
+import socket
+import urllib.request
+
+import pytest
+
+from slimvlc.metrics import Counter, Gauge, Histogram, Metrics, Registry, parse_address
+from slimvlc.metrics_server import CONTENT_TYPE, serve
+
+
+def test_counter_render():
+    counter = Counter("things_total", 'Things "counted"\nhere', ("kind",))
+    counter.inc('a"b\\c\nd')
+    counter.inc('a"b\\c\nd', amount=2)
+    assert counter.render() == [
+        '# HELP things_total Things \\"counted\\"\\nhere',
+        "# TYPE things_total counter",
+        'things_total{kind="a\\"b\\\\c\\nd"} 3',
+    ]
+
+
+def test_unlabelled_metrics_are_seeded():
+    assert Counter("seeks_total", "Seeks").render()[-1] == "seeks_total 0"
+    assert Gauge("depth", "Depth").render()[-1] == "depth 0"
+    assert Histogram("wait", "Wait", buckets=(1.0,)).render()[2:] == [
+        'wait_bucket{le="1"} 0',
+        'wait_bucket{le="+Inf"} 0',
+        "wait_sum 0",
+        "wait_count 0",
+    ]
+    labelled = Counter("events_total", "Events", ("type",))
+    assert labelled.render() == [
+        "# HELP events_total Events",
+        "# TYPE events_total counter",
+    ]
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("latency_seconds", "Latency", ("type",), (0.1, 0.5, 1.0))
+    for value in (0.05, 0.1, 0.3, 2.0):
+        histogram.observe(value, "x")
+    assert histogram.render()[2:] == [
+        'latency_seconds_bucket{type="x",le="0.1"} 2',
+        'latency_seconds_bucket{type="x",le="0.5"} 3',
+        'latency_seconds_bucket{type="x",le="1"} 3',
+        'latency_seconds_bucket{type="x",le="+Inf"} 4',
+        'latency_seconds_sum{type="x"} 2.45',
+        'latency_seconds_count{type="x"} 4',
+    ]
+
+
+def test_registry_collectors():
+    registry = Registry()
+    registry.register(Counter("a_total", "A"))
+
+    def collect():
+        gauge = Gauge("b", "B", ("stat",))
+        gauge.set(1.5, "rate")
+        return (gauge,)
+
+    def broken():
+        raise RuntimeError
+
+    registry.add_collector(collect)
+    registry.add_collector(collect)
+    registry.add_collector(broken)
+    assert registry.render() == "\n".join(
+        (
+            "# HELP a_total A",
+            "# TYPE a_total counter",
+            "a_total 0",
+            "# HELP b B",
+            "# TYPE b gauge",
+            'b{stat="rate"} 1.5',
+            "",
+        )
+    )
+
+
+@pytest.mark.parametrize(
+    "address, expected",
+    (
+        ("9100", ("127.0.0.1", 9100)),
+        ("0.0.0.0:9100", ("0.0.0.0", 9100)),
+        ("[::1]:9100", ("::1", 9100)),
+        ("unix:metrics.sock", "metrics.sock"),
+        ("/run/slimvlc.sock", "/run/slimvlc.sock"),
+        ("./slimvlc.sock", "./slimvlc.sock"),
+    ),
+)
+def test_parse_address(address, expected):
+    assert parse_address(address) == expected
+
+
+@pytest.mark.parametrize(
+    "address", ("x.sock", "host:", "::1:9100", "70000", "unix:", "localhost:http")
+)
+def test_parse_address_rejects(address):
+    with pytest.raises(ValueError):
+        parse_address(address)
+
+
+def _get(url):
+    with urllib.request.urlopen(url) as response:
+        return response.headers["Content-Type"], response.read().decode("utf8")
+
+
+def test_serve_tcp():
+    metrics = Metrics()
+    metrics.seeks.inc()
+    server = serve(metrics, "127.0.0.1:0")
+    try:
+        host, port = server.server_address[:2]
+        content_type, body = _get(f"http://{host}:{port}/metrics")
+        assert content_type == CONTENT_TYPE
+        assert body == metrics.render()
+        assert "slimvlc_seeks_total 1\n" in body
+        with pytest.raises(urllib.error.HTTPError) as error:
+            _get(f"http://{host}:{port}/nope")
+        assert error.value.code == 404
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.mark.skipif(not socket.has_ipv6, reason="No IPv6 support")
+def test_serve_ipv6():
+    try:
+        server = serve(Metrics(), "[::1]:0")
+    except OSError:
+        pytest.skip("::1 is not available")
+    try:
+        port = server.server_address[1]
+        _, body = _get(f"http://[::1]:{port}/metrics")
+        assert "slimvlc_snapshots_total 0\n" in body
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_serve_unix(tmp_path):
+    path = str(tmp_path / "metrics.sock")
+    server = serve(Metrics(), f"unix:{path}")
+    try:
+        client = socket.socket(socket.AF_UNIX)
+        client.connect(path)
+        with client:
+            client.sendall(b"GET /metrics HTTP/1.0\r\n\r\n")
+            response = b"".join(iter(lambda: client.recv(4096), b""))
+        assert response.startswith(b"HTTP/1.0 200 OK")
+        assert b"slimvlc_seeks_total 0\n" in response
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,147 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from slimvlc.subtitles import (
+    NO_SUBTITLES,
+    find_sidecar_subtitles,
+    index_subtitles,
+    merge_spu_descriptions,
+    preferred_subtitle_index,
+    subtitles_from_tracks,
+)
+
+
+def _track(track_id, language, type_=2, description=b"Track"):
+    return SimpleNamespace(
+        id=track_id,
+        type=SimpleNamespace(value=type_),
+        language=language,
+        description=description,
+    )
+
+
+@pytest.fixture
+def media(tmp_path):
+    for name in (
+        "movie.mkv",
+        "movie.srt",
+        "movie.EN.Forced.ASS",
+        "movie.fr.vtt",
+        "movie.en.txt",
+        "movie2.srt",
+        "moviextra.srt",
+        "other.srt",
+    ):
+        (tmp_path / name).touch()
+    return str(tmp_path / "movie.mkv")
+
+
+def test_find_sidecar_subtitles(media):
+    directory = os.path.dirname(media)
+    assert find_sidecar_subtitles(media) == (
+        (os.path.join(directory, "movie.EN.Forced.ASS"), "en"),
+        (os.path.join(directory, "movie.fr.vtt"), "fr"),
+        (os.path.join(directory, "movie.srt"), ""),
+    )
+
+
+def test_find_sidecar_subtitles_needs_a_local_file(tmp_path):
+    assert find_sidecar_subtitles(str(tmp_path / "missing.mkv")) == ()
+    assert find_sidecar_subtitles("http://example.com/movie.mkv") == ()
+
+
+def test_subtitles_from_tracks():
+    subtitles = subtitles_from_tracks(
+        (
+            _track(0, b"eng", type_=1),
+            _track(3, b"ENG"),
+            _track(4, None, description=b"Commentary"),
+        )
+    )
+    assert [(track["id"], track["name"], track["language"]) for track in subtitles] == [
+        (-1, "nolang", None),
+        (3, "eng", "eng"),
+        (4, "Commentary", "und"),
+    ]
+    assert index_subtitles(subtitles) == (
+        {-1: 0, 3: 1, 4: 2},
+        {"eng": [1], "und": [2]},
+    )
+
+
+@pytest.mark.parametrize(
+    "languages, expected",
+    (
+        ((), 1),
+        (("fr",), 2),
+        (("de", "fr", "eng"), 2),
+        (("off", "fr"), 0),
+        (("de", "none"), 0),
+        (("de",), 1),
+    ),
+)
+def test_preferred_subtitle_index(languages, expected):
+    subtitles = subtitles_from_tracks((_track(3, b"eng"), _track(4, b"fr")))
+    _, by_language = index_subtitles(subtitles)
+    assert preferred_subtitle_index(subtitles, by_language, languages) == expected
+
+
+def test_preferred_subtitle_index_without_subtitles():
+    subtitles = (NO_SUBTITLES,)
+    _, by_language = index_subtitles(subtitles)
+    assert preferred_subtitle_index(subtitles, by_language, ("eng",)) == 0
+    assert preferred_subtitle_index(subtitles, by_language, ()) == 0
+
+
+def _merge(descriptions, sidecars):
+    subtitles = subtitles_from_tracks((_track(3, b"eng"), _track(4, b"jpn")))
+    by_id, _ = index_subtitles(subtitles)
+    merged = merge_spu_descriptions(subtitles, by_id, descriptions, sidecars)
+    return [(track["id"], track["name"], track["language"]) for track in merged]
+
+
+def test_merge_adds_sidecars_in_order():
+    sidecars = (("/m/movie.en.srt", "en"), ("/m/movie.srt", ""))
+    descriptions = [(-1, b"Disable"), (3, b"Track 1"), (4, b"Track 2")]
+    descriptions += [(8, b"Track 3"), (9, b"Track 4")]
+    assert _merge(descriptions, sidecars) == [
+        (-1, "nolang", None),
+        (3, "eng", "eng"),
+        (4, "jpn", "jpn"),
+        (8, "movie.en.srt", "en"),
+        (9, "movie.srt", "und"),
+    ]
+
+
+def test_merge_matches_sidecars_by_name_first():
+    sidecars = (("/m/movie.en.srt", "en"), ("/m/movie.fr.srt", "fr"))
+    descriptions = [(-1, b"Disable"), (3, b"x"), (4, b"y")]
+    descriptions += [(8, b"Track 3 - movie.fr.srt"), (9, b"Track 4")]
+    assert _merge(descriptions, sidecars)[3:] == [
+        (8, "movie.fr.srt", "fr"),
+        (9, "movie.en.srt", "en"),
+    ]
+
+
+def test_merge_matches_by_id_only():
+    # A parse-time id libvlc does not offer is dropped, never given another
+    # track's id by position.
+    sidecars = (("/m/movie.en.srt", "en"),)
+    descriptions = [(-1, b"Disable"), (3, b"Track 1"), (8, b"Track 3")]
+    assert _merge(descriptions, sidecars) == [
+        (-1, "nolang", None),
+        (3, "eng", "eng"),
+        (8, "movie.en.srt", "en"),
+    ]
+
+
+def test_merge_leaves_unmatched_tracks_undetermined():
+    sidecars = (("/m/movie.en.srt", "en"),)
+    descriptions = [(-1, b"Disable"), (3, b"a"), (4, b"b"), (8, b"c"), (9, b"d")]
+    assert _merge(descriptions, sidecars)[3:] == [
+        (8, "c", "und"),
+        (9, "d", "und"),
+    ]
+    assert _merge([], sidecars) == [(-1, "nolang", None)]